@@ -1,6 +1,11 @@
 import os
 import re
 import json
+import copy
+import functools
+import operator
+import threading
+import concurrent.futures
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, colorchooser
 
@@ -17,6 +22,7 @@ from storage import (
     read_note,
     edit_note,
     delete_note,
+    flush_index,
 )
 
 from ollama_client import (
@@ -29,6 +35,54 @@ from ollama_client import (
 from cv_pdf import export_cv_pdf
 
 
+# Polices (tuples partagés plutôt que recréés à chaque widget)
+FONT_H1 = ("Segoe UI", 22, "bold")
+FONT_H2 = ("Segoe UI", 16, "bold")
+FONT_H3 = ("Segoe UI", 12, "bold")
+FONT_TITLE = ("Segoe UI", 14, "bold")
+FONT_LARGE = ("Segoe UI", 14)
+FONT_LEAD = ("Segoe UI", 12)
+FONT_MUTED = ("Segoe UI", 11)
+FONT_BODY = ("Segoe UI", 10)
+FONT_BODY_BOLD = ("Segoe UI", 10, "bold")
+FONT_CV_NAME = ("Segoe UI", 20, "bold")
+
+# Taille max d'un cours envoyé au générateur de QCM (au-delà, le modèle ne suit plus)
+MAX_QCM_BYTES = 2 * 1024 * 1024
+
+# Couleurs
+COLOR_BG = "#EAF2FF"
+COLOR_PANEL = "#D7E8FF"
+COLOR_WHITE = "#FFFFFF"
+COLOR_TEXT = "#0F172A"
+COLOR_MUTED = "#365A9C"
+COLOR_BORDER = "#B7C9E8"
+
+# Thème ttk complet, construit une fois par processus et appliqué en un seul appel
+THEME_NAME = "cartable_theme"
+THEME_SETTINGS = {
+    "TFrame": {"configure": {"background": COLOR_BG}},
+    "Panel.TFrame": {"configure": {"background": COLOR_PANEL}},
+    "Card.TFrame": {"configure": {"background": COLOR_WHITE}},
+
+    "TLabel": {"configure": {"background": COLOR_BG, "foreground": COLOR_TEXT, "font": FONT_BODY}},
+    "Title.TLabel": {"configure": {"background": COLOR_BG, "foreground": COLOR_TEXT, "font": FONT_TITLE}},
+    "Muted.TLabel": {"configure": {"background": COLOR_BG, "foreground": COLOR_MUTED, "font": FONT_BODY}},
+    "Card.TLabel": {"configure": {"background": COLOR_WHITE, "foreground": COLOR_TEXT, "font": FONT_BODY}},
+
+    "TNotebook": {"configure": {"background": COLOR_BG, "borderwidth": 0}},
+    "TNotebook.Tab": {"configure": {"padding": (14, 8)}},
+
+    "TButton": {"configure": {"font": FONT_BODY, "padding": (10, 6)}},
+    "Primary.TButton": {"configure": {"font": FONT_BODY_BOLD, "padding": (10, 6)}},
+
+    "TEntry": {"configure": {"padding": (6, 6)}},
+    "TCombobox": {"configure": {"padding": (6, 6)}},
+    "TLabelframe": {"configure": {"background": COLOR_BG}},
+    "TLabelframe.Label": {"configure": {"background": COLOR_BG, "foreground": COLOR_TEXT, "font": FONT_BODY_BOLD}},
+}
+
+
 # =========================
 # Scrollable Frame
 # =========================
@@ -48,59 +102,161 @@ class ScrollableFrame(ttk.Frame):
 
         self.inner.bind("<Configure>", self._on_inner_configure)
         self.canvas.bind("<Configure>", self._on_canvas_configure)
-
-        # Molette
-        self.canvas.bind_all("<MouseWheel>", self._on_mousewheel, add="+")
+        self._scrollregion = None
+
+        # Molette : active seulement quand la souris est au-dessus du frame,
+        # les crans sont cumulés puis appliqués en une fois (after_idle).
+        # Le handler est choisi une fois selon la plateforme.
+        self._pending_scroll = 0
+        self._scroll_scheduled = False
+        ws = self.tk.call("tk", "windowingsystem")
+        if ws == "x11":
+            self._wheel_bindings = (("<Button-4>", self._on_wheel_x11), ("<Button-5>", self._on_wheel_x11))
+        elif ws == "aqua":
+            self._wheel_bindings = (("<MouseWheel>", self._on_wheel_aqua),)
+        else:
+            self._wheel_bindings = (("<MouseWheel>", self._on_wheel_win),)
+        for w in (self.canvas, self.inner):
+            w.bind("<Enter>", self._bind_wheel)
+            w.bind("<Leave>", self._unbind_wheel)
+
+    def _bind_wheel(self, _=None):
+        for seq, handler in self._wheel_bindings:
+            self.canvas.bind_all(seq, handler)
+
+    def _unbind_wheel(self, event):
+        # <Leave> arrive aussi quand on passe sur un widget enfant : on garde la molette
+        w = self.winfo_containing(event.x_root, event.y_root)
+        if w is not None and (w is self or str(w).startswith(str(self) + ".")):
+            return
+        for seq, _ in self._wheel_bindings:
+            self.canvas.unbind_all(seq)
 
     def _on_inner_configure(self, _):
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        bbox = self.canvas.bbox("all")
+        if bbox != self._scrollregion:
+            self._scrollregion = bbox
+            self.canvas.configure(scrollregion=bbox)
 
     def _on_canvas_configure(self, event):
         self.canvas.itemconfigure(self.inner_id, width=event.width)
 
-    def _on_mousewheel(self, event):
-        try:
-            self.canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
-        except Exception:
-            pass
+    def _on_wheel_win(self, event):
+        self._queue_scroll(int(-1 * (event.delta / 120)))
+
+    def _on_wheel_aqua(self, event):
+        self._queue_scroll(int(-1 * event.delta))
+
+    def _on_wheel_x11(self, event):
+        # Button-4 = haut, Button-5 = bas
+        self._queue_scroll(-1 if event.num == 4 else 1)
+
+    def _queue_scroll(self, units):
+        self._pending_scroll += units
+        if not self._scroll_scheduled:
+            self._scroll_scheduled = True
+            self.canvas.after_idle(self._flush_scroll)
+
+    def _flush_scroll(self):
+        units = self._pending_scroll
+        self._pending_scroll = 0
+        self._scroll_scheduled = False
+        if units:
+            self.canvas.yview_scroll(units, "units")
 
 
 # =========================
 # QCM parsing helpers
 # =========================
+# Un seul passage sur le texte : en-têtes Qn, ANSWER, EXPLANATION
+# (en-tête en majuscule en début de ligne, sauf le tout premier : q1: accepté)
+_RE_QCM_TOKEN = re.compile(
+    r"^(?P<qhead>(?-i:Q)\d+\s*[:\-\)])"
+    r"|(?P<ans>(?:ANSWER|R[ÉE]PONSE)\s*[:\-])"
+    r"|(?P<exp>(?:EXPLANATION|EXPLICATION)\s*[:\-])",
+    re.IGNORECASE | re.MULTILINE,
+)
+_RE_QHEAD_FIRST = re.compile(r"Q\d+\s*[:\-\)]", re.IGNORECASE)
+_RE_OPT_LINE = re.compile(r"^\s*([A-F])[\)\.\:\-]\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+_RE_OPT_INLINE = re.compile(r"([A-F])[\)\.\:\-]\s*([^A-F]+?)(?=(?:\s+[A-F][\)\.\:\-])|$)", re.IGNORECASE)
+_RE_OPT_MARK = re.compile(r"[A-F][\)\.\:\-]", re.IGNORECASE)
+_RE_LETTER = re.compile(r"\b([A-F])\b")
+_CRLF_TABLE = str.maketrans({"\r": None})
+_strip = operator.methodcaller("strip")
+_LETTER_IDX = {"A": 0, "B": 1, "C": 2, "D": 3, "E": 4, "F": 5}
+
+
+_DECODER = json.JSONDecoder()
+
+
 def _extract_json_obj(text: str):
     """Essaie de récupérer un JSON même si l'IA a ajouté du texte autour."""
-    if not text:
-        return None
-    t = text.strip()
+    return next(_iter_json_values(text), None)
 
-    # 1) direct
-    try:
-        return json.loads(t)
-    except Exception:
-        pass
 
-    # 2) premier {...}
-    m = re.search(r"\{[\s\S]*\}", t)
-    if m:
-        try:
-            return json.loads(m.group(0))
-        except Exception:
-            pass
+def _iter_json_values(text: str):
+    """
+    Valeurs JSON trouvées dans text, dans l'ordre : un texte autour ("note [1]",
+    exemple {"a": 1}...) ne doit pas cacher le QCM qui suit.
+    """
+    if not text:
+        return
 
-    # 3) première [...]
-    m = re.search(r"\[[\s\S]*\]", t)
-    if m:
+    # raw_decode parse à partir de idx et ignore ce qui suit :
+    # un seul passage par candidat, en partant du premier { ou [ (objet ou liste de questions).
+    # Pas de text.strip() : on travaille par positions, sans copier la réponse.
+    idx = _next_json_start(text, 0)
+    while idx >= 0:
         try:
-            return json.loads(m.group(0))
-        except Exception:
+            obj, _ = _DECODER.raw_decode(text, idx)
+        except ValueError:
             pass
+        else:
+            yield obj
+        # on repart juste après idx : un QCM peut être imbriqué ({"qcm": [...]})
+        idx = _next_json_start(text, idx + 1)
 
-    return None
+
+def _next_json_start(text: str, start: int) -> int:
+    """Position du premier { ou [ à partir de start, ou -1."""
+    i = text.find("{", start)
+    j = text.find("[", start)
+    if i < 0:
+        return j
+    if j < 0:
+        return i
+    return min(i, j)
+
+
+# QCM stocké par colonnes : qcm["question"][i], qcm["options"][i], ...
+_QCM_FIELDS = ("question", "options", "answer", "explanation")
+_QCM_KEYS = set(_QCM_FIELDS)
+
+
+def _is_stripped_str(x) -> bool:
+    return isinstance(x, str) and x == x.strip()
+
+
+def _is_canonical_question(q) -> bool:
+    """True si q est déjà propre : {question, options, answer, explanation} sans rien à nettoyer."""
+    if not isinstance(q, dict) or q.keys() != _QCM_KEYS:
+        return False
+    opts = q["options"]
+    return (
+        bool(q["question"]) and _is_stripped_str(q["question"])
+        and isinstance(opts, list) and len(opts) >= 2
+        and all(o and _is_stripped_str(o) for o in opts)
+        and _is_stripped_str(q["explanation"])
+        # réponse "vide" (0, "") : le chemin lent la remplace par None, il doit s'en charger
+        and bool(q["answer"])
+    )
 
 
 def _normalize_qcm(data):
-    """Normalise différents formats JSON vers: {"questions":[{question, options, answer, explanation}]}"""
+    """
+    Normalise différents formats JSON vers un QCM par colonnes :
+    {"question": [...], "options": [[...], ...], "answer": [...], "explanation": [...]}
+    """
     if data is None:
         return None
 
@@ -117,7 +273,11 @@ def _normalize_qcm(data):
     if not isinstance(qs, list) or not qs:
         return None
 
-    out = []
+    # déjà propre -> on recopie juste les colonnes
+    if all(_is_canonical_question(q) for q in qs):
+        return {f: [q[f] for q in qs] for f in _QCM_FIELDS}
+
+    out = {f: [] for f in _QCM_FIELDS}
     for q in qs:
         if not isinstance(q, dict):
             continue
@@ -127,13 +287,14 @@ def _normalize_qcm(data):
         # options dict {"A": "..."} -> liste A) ...
         if isinstance(opts, dict):
             ordered = []
-            for k in ["A", "B", "C", "D", "E", "F"]:
+            for k in _LETTER_IDX:
                 if k in opts:
-                    ordered.append(f"{k}) {str(opts[k]).strip()}")
+                    v = str(opts[k]).strip()
+                    ordered.append(f"{k}) {v}")
             opts = ordered
 
         if isinstance(opts, list):
-            opts = [str(x).strip() for x in opts if str(x).strip()]
+            opts = list(filter(None, map(_strip, map(str, opts))))
 
         ans = q.get("answer") or q.get("correct") or q.get("correct_answer")
         exp = (q.get("explanation") or q.get("exp") or "").strip()
@@ -141,17 +302,132 @@ def _normalize_qcm(data):
         if not question or len(opts) < 2:
             continue
 
-        out.append({
-            "question": question,
-            "options": opts,
-            "answer": ans,
-            "explanation": exp
-        })
+        out["question"].append(question)
+        out["options"].append(opts)
+        out["answer"].append(ans)
+        out["explanation"].append(exp)
 
-    if not out:
+    if not out["question"]:
         return None
 
-    return {"questions": out}
+    return out
+
+
+@functools.lru_cache(maxsize=64)
+def _parse_qcm_cached(text: str):
+    """JSON -> QCM normalisé, mémoïsé sur le texte brut (ne pas modifier le résultat)."""
+    # premier JSON qui est vraiment un QCM
+    for obj in _iter_json_values(text):
+        try:
+            data = _normalize_qcm(obj)
+        except (AttributeError, TypeError):
+            # champs d'un autre type (ex. {"q": 1}) : ce n'est pas ce QCM-là
+            continue
+        if data:
+            return data
+    return None
+
+
+def _parse_qcm_json(text: str):
+    """Premier JSON du texte qui est un QCM, normalisé, sans refaire le travail pour un texte déjà vu."""
+    if not text:
+        return None
+    return copy.deepcopy(_parse_qcm_cached(text))
+
+
+def _answer_letter_at(t: str, i: int):
+    """Lettre A-F juste après un mot-clé ANSWER/RÉPONSE (espaces ignorés), ou None."""
+    n = len(t)
+    while i < n and t[i].isspace():
+        i += 1
+    if i < n and t[i].upper() in _LETTER_IDX:
+        if i + 1 == n or not (t[i + 1].isalnum() or t[i + 1] == "_"):
+            return t[i].upper()
+    return None
+
+
+def _finish_qcm_block(t: str, block: dict, end: int):
+    """Construit (question, options, answer, explanation) pour le bloc t[start:end], ou None."""
+    # la question et les options s'arrêtent au premier mot-clé ANSWER/EXPLANATION
+    if block["cut"] is not None:
+        rest_clean = t[block["start"]:block["cut"]].lstrip()
+    else:
+        rest_clean = t[block["start"]:end].strip()
+
+    # options A) ... B) ... (le texte peut être sur la ligne suivante) ;
+    # option vide -> "E)" et non "E) ", comme après _normalize_qcm
+    opt_lines = list(_RE_OPT_LINE.finditer(rest_clean))
+    if len(opt_lines) >= 2:
+        question_text = rest_clean[:opt_lines[0].start()].strip()
+        values = map(_strip, (mm[2] for mm in opt_lines))
+        options = [f"{mm[1].upper()}) {v}".strip() for mm, v in zip(opt_lines, values)]
+    else:
+        # parfois options sur une seule ligne "A) ... B) ..." -> on tente un split simple
+        opt_inline = list(_RE_OPT_INLINE.finditer(rest_clean))
+        if len(opt_inline) < 2:
+            return None
+        first = _RE_OPT_MARK.search(rest_clean)
+        question_text = rest_clean[:first.start() if first else len(rest_clean)].strip()
+        values = map(_strip, (mm[2] for mm in opt_inline))
+        options = [f"{mm[1].upper()}) {v}".strip() for mm, v in zip(opt_inline, values)]
+
+    if not question_text:
+        question_text = "(Question)"
+
+    exp = t[block["exp"]:end].strip() if block["exp"] is not None else ""
+    return question_text, tuple(options), block["ans"], exp
+
+
+@functools.lru_cache(maxsize=32)
+def _parse_qcm_from_text_impl(raw: str) -> tuple:
+    """
+    Cœur du parseur texte, mémoïsé : renvoie un tuple de
+    (question, tuple(options), answer, explanation).
+    """
+    t = raw.strip()
+
+    # Standardiser séparateurs (translate : un seul passage en C)
+    if "\r" in t:
+        t = t.translate(_CRLF_TABLE)
+
+    questions = []
+    block = None
+    pos = 0
+    m = _RE_QHEAD_FIRST.match(t)
+    if m:
+        block = {"start": m.end(), "cut": None, "ans": None, "exp": None}
+        pos = m.end()
+
+    for m in _RE_QCM_TOKEN.finditer(t, pos):
+        kind = m.lastgroup
+
+        if kind == "qhead":
+            # Q1:, Q2: ... (ou "Q1 -", "Q1)") -> nouveau bloc
+            if block:
+                q = _finish_qcm_block(t, block, m.start())
+                if q:
+                    questions.append(q)
+            block = {"start": m.end(), "cut": None, "ans": None, "exp": None}
+            continue
+
+        if block is None:
+            continue
+
+        # ANSWER / EXPLANATION : la question et les options s'arrêtent au premier mot-clé
+        if block["cut"] is None:
+            block["cut"] = m.start()
+        if kind == "ans":
+            if block["ans"] is None:
+                block["ans"] = _answer_letter_at(t, m.end())
+        elif block["exp"] is None:
+            block["exp"] = m.end()
+
+    if block:
+        q = _finish_qcm_block(t, block, len(t))
+        if q:
+            questions.append(q)
+
+    return tuple(questions)
 
 
 def _parse_qcm_from_text(raw: str):
@@ -168,71 +444,65 @@ def _parse_qcm_from_text(raw: str):
     if not raw:
         return None
 
-    t = raw.strip()
+    questions = _parse_qcm_from_text_impl(raw)
+    if not questions:
+        return None
 
-    # Standardiser séparateurs
-    t = t.replace("\r\n", "\n")
+    question, options, answer, explanation = zip(*questions)
+    return {
+        "question": list(question),
+        "options": [list(o) for o in options],
+        "answer": list(answer),
+        "explanation": list(explanation),
+    }
 
-    # Découper sur Q1:, Q2: ... (ou "Q1 -", "Q1)")
-    parts = re.split(r"\n(?=Q\d+\s*[:\-\)])", "\n" + t)
-    parts = [p.strip() for p in parts if p.strip()]
 
-    questions = []
-    for block in parts:
-        # Qn: question...
-        m = re.match(r"Q(\d+)\s*[:\-\)]\s*(.*)", block, flags=re.IGNORECASE | re.DOTALL)
-        if not m:
-            continue
-        rest = m.group(2).strip()
-
-        # récupérer ANSWER / EXPLANATION si présents
-        ans_letter = None
-        exp = ""
-
-        m_ans = re.search(r"(?:ANSWER|R[ÉE]PONSE)\s*[:\-]\s*([A-F])\b", rest, flags=re.IGNORECASE)
-        if m_ans:
-            ans_letter = m_ans.group(1).upper()
-
-        m_exp = re.search(r"(?:EXPLANATION|EXPLICATION)\s*[:\-]\s*([\s\S]*)", rest, flags=re.IGNORECASE)
-        if m_exp:
-            exp = m_exp.group(1).strip()
-
-        # enlever les sections ANSWER/EXPLANATION du "rest"
-        rest_clean = re.split(r"(?:ANSWER|R[ÉE]PONSE)\s*[:\-]", rest, flags=re.IGNORECASE)[0]
-        rest_clean = re.split(r"(?:EXPLANATION|EXPLICATION)\s*[:\-]", rest_clean, flags=re.IGNORECASE)[0]
-
-        # options A) ... B) ...
-        # on veut capturer question (avant la première option)
-        opt_matches = list(re.finditer(r"^\s*([A-F])[\)\.\:\-]\s*(.+)$", rest_clean, flags=re.IGNORECASE | re.MULTILINE))
-        if len(opt_matches) < 2:
-            # parfois options sur une seule ligne "A) ... B) ..." -> on tente un split simple
-            opt_inline = re.findall(r"([A-F])[\)\.\:\-]\s*([^A-F]+?)(?=(?:\s+[A-F][\)\.\:\-])|$)", rest_clean, flags=re.IGNORECASE)
-            if len(opt_inline) >= 2:
-                question_text = re.split(r"[A-F][\)\.\:\-]\s*", rest_clean, 1, flags=re.IGNORECASE)[0].strip()
-                options = [f"{k.upper()}) {v.strip()}" for k, v in opt_inline]
-            else:
-                continue
-        else:
-            first_opt_pos = opt_matches[0].start()
-            question_text = rest_clean[:first_opt_pos].strip()
-            options = []
-            for mm in opt_matches:
-                options.append(f"{mm.group(1).upper()}) {mm.group(2).strip()}")
-
-        if not question_text:
-            question_text = "(Question)"
-
-        questions.append({
-            "question": question_text,
-            "options": options,
-            "answer": ans_letter,
-            "explanation": exp
-        })
+class _DaemonPool:
+    """
+    Comme un ThreadPoolExecutor (submit -> Future), mais avec des threads daemon :
+    un appel IA en cours (jusqu'à OLLAMA_TIMEOUT) n'empêche pas le programme de quitter.
+    """
 
-    if not questions:
-        return None
+    def __init__(self, max_workers: int):
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._closed = False
+
+    def submit(self, fn, *args, **kwargs):
+        fut = concurrent.futures.Future()
+        threading.Thread(target=self._work, args=(fut, fn, args, kwargs), daemon=True).start()
+        return fut
+
+    def _work(self, fut, fn, args, kwargs):
+        with self._slots:
+            # tâche encore en attente à la fermeture : annulée, pas lancée
+            if self._closed:
+                fut.cancel()
+            if not fut.set_running_or_notify_cancel():
+                return
+            try:
+                fut.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                fut.set_exception(e)
+
+    def shutdown(self):
+        """Plus aucune nouvelle tâche ne démarre ; celles en cours sont abandonnées."""
+        self._closed = True
+
+
+_PARSE_POOL = _DaemonPool(max_workers=2)
+
+
+def _parse_qcm_pipeline(raw: str):
+    """Réponse IA brute -> QCM normalisé (JSON d'abord, puis fallback texte)."""
+    # 1) JSON
+    data = _parse_qcm_json(raw)
 
-    return {"questions": questions}
+    # 2) fallback texte (IMPORTANT pour ton cas !) : le parseur renvoie déjà
+    # question / options / explication nettoyées, comme _normalize_qcm
+    if not data:
+        data = _parse_qcm_from_text(raw)
+
+    return data
 
 
 def _answer_to_index(answer, options):
@@ -249,10 +519,16 @@ def _answer_to_index(answer, options):
     if not s:
         return None
 
-    m = re.search(r"\b([A-F])\b", s.upper())
-    if m:
-        idx = ord(m.group(1)) - ord("A")
-        return idx if 0 <= idx < n else None
+    # cas courant : une seule lettre, sans passer par la regex
+    if len(s) == 1:
+        idx = _LETTER_IDX.get(s.upper())
+        if idx is not None:
+            return idx if idx < n else None
+    else:
+        m = _RE_LETTER.search(s.upper())
+        if m:
+            idx = _LETTER_IDX[m.group(1)]
+            return idx if idx < n else None
 
     if s.isdigit():
         val = int(s)
@@ -275,12 +551,12 @@ class CartableApp(tk.Tk):
         self.minsize(1050, 650)
 
         # Couleurs
-        self.bg = "#EAF2FF"
-        self.panel = "#D7E8FF"
-        self.white = "#FFFFFF"
-        self.text = "#0F172A"
-        self.muted = "#365A9C"
-        self.border = "#B7C9E8"
+        self.bg = COLOR_BG
+        self.panel = COLOR_PANEL
+        self.white = COLOR_WHITE
+        self.text = COLOR_TEXT
+        self.muted = COLOR_MUTED
+        self.border = COLOR_BORDER
 
         self.configure(bg=self.bg)
         self._setup_styles()
@@ -294,7 +570,7 @@ class CartableApp(tk.Tk):
             text="Cartable Numérique",
             bg=self.panel,
             fg=self.text,
-            font=("Segoe UI", 22, "bold"),
+            font=FONT_H1,
         ).pack(side="left", padx=18, pady=12)
 
         tk.Label(
@@ -302,7 +578,7 @@ class CartableApp(tk.Tk):
             text="Cloud • Notes • QCM IA • Carrière",
             bg=self.panel,
             fg=self.muted,
-            font=("Segoe UI", 11),
+            font=FONT_MUTED,
         ).pack(side="left", padx=12, pady=12)
 
         container = tk.Frame(self, bg=self.bg)
@@ -323,60 +599,108 @@ class CartableApp(tk.Tk):
         self.notebook.add(self.tab_qcm, text="🧠 QCM IA")
         self.notebook.add(self.tab_career, text="💼 Carrière IA")
 
+        # Appels IA / export PDF hors du thread Tk
+        self._executor = _DaemonPool(max_workers=2)
+
         # State
         self.cv_ai = None
+        self._profile_display = ""       # profil tronqué pour l'aperçu, calculé à chaque nouveau CV
         self.qcm_data = None
         self.qcm_index = 0
         self.qcm_user_answers = {}
-
-        # Build
+        self._docs_index = []        # documents affichés, dans l'ordre de docs_list
+        self._notes_index = []       # notes affichées, dans l'ordre de notes_list
+        self._known_titles = set()   # titres des notes (évite de relire l'index)
+        self._note_dirty = False     # texte modifié depuis la dernière sauvegarde
+        self._last_save_sig = None
+        self._open_note_after_id = None
+        self._current_doc_name = None     # sélection courante, tenue à jour par <<ListboxSelect>>
+        self._current_note_title = None
+        self._preview_sig = None          # dernier aperçu CV dessiné (évite de tout recréer)
+        self._redraw_pending = None
+        self._cv_generating = False       # CV IA en cours : l'aperçu affiche l'attente
+
+        # Build : l'accueil tout de suite, les autres onglets à la première ouverture
         self._build_home_tab()
-        self._build_cloud_tab()
-        self._build_notes_tab()
-        self._build_qcm_tab()
-        self._build_career_tab()
-
-        # Load
-        self.refresh_cloud()
-        self.refresh_folders()
-        self.refresh_notes()
+        self._pending_tabs = {
+            str(self.tab_cloud): (self._build_cloud_tab, (self.refresh_cloud, self.refresh_folders)),
+            str(self.tab_notes): (self._build_notes_tab, (self.refresh_notes,)),
+            str(self.tab_qcm): (self._build_qcm_tab, ()),
+            str(self.tab_career): (self._build_career_tab, ()),
+        }
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
 
         # Notes shortcut
-        self.bind_all("<Control-s>", lambda e: self.gui_update_note())
+        self.bind_all("<Control-s>", self._on_save_shortcut)
 
         # Autosave notes
         self._autosave_interval_ms = 20000
         self.after(self._autosave_interval_ms, self._autosave_notes)
 
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    def _on_close(self):
+        # l'index est écrit en différé : on vide ce qui reste avant de quitter
+        try:
+            flush_index()
+        except Exception as e:
+            messagebox.showerror("Erreur", f"Impossible d'enregistrer l'index:\n{e}")
+        # les appels IA encore en cours ne bloquent pas la sortie (threads daemon)
+        self._executor.shutdown()
+        self.destroy()
+
+    # =========================
+    # Onglets construits à la demande
+    # =========================
+    def _on_tab_changed(self, _=None):
+        pending = self._pending_tabs.pop(self.notebook.select(), None)
+        if not pending:
+            return
+        build, refreshers = pending
+        build()
+        for refresh in refreshers:
+            refresh()
+
+    def _tab_is_built(self, tab):
+        return str(tab) not in self._pending_tabs
+
+    # =========================
+    # Tâches en arrière-plan
+    # =========================
+    def _run_in_background(self, fn, *args, on_done, on_error, pool=None, **kwargs):
+        """Lance fn dans un thread puis appelle on_done(résultat) / on_error(e) sur le thread Tk."""
+        fut = (pool or self._executor).submit(fn, *args, **kwargs)
+        self.after(50, self._poll_future, fut, on_done, on_error)
+
+    def _poll_future(self, fut, on_done, on_error):
+        if not fut.done():
+            self.after(50, self._poll_future, fut, on_done, on_error)
+            return
+        try:
+            result = fut.result()
+        except Exception as e:
+            on_error(e)
+            return
+        on_done(result)
+
     # =========================
     # Styles
     # =========================
     def _setup_styles(self):
+        # une seule fois par fenêtre
+        if getattr(self, "_styles_done", False):
+            return
+
         style = ttk.Style(self)
         try:
-            style.theme_use("clam")
+            # tout le thème en une évaluation Tcl plutôt qu'un configure par style
+            if THEME_NAME not in style.theme_names():
+                style.theme_create(THEME_NAME, parent="clam", settings=THEME_SETTINGS)
+            style.theme_use(THEME_NAME)
         except Exception:
             pass
 
-        style.configure("TFrame", background=self.bg)
-        style.configure("Panel.TFrame", background=self.panel)
-        style.configure("Card.TFrame", background=self.white)
-
-        style.configure("TLabel", background=self.bg, foreground=self.text, font=("Segoe UI", 10))
-        style.configure("Title.TLabel", background=self.bg, foreground=self.text, font=("Segoe UI", 14, "bold"))
-        style.configure("Muted.TLabel", background=self.bg, foreground=self.muted, font=("Segoe UI", 10))
-        style.configure("Card.TLabel", background=self.white, foreground=self.text, font=("Segoe UI", 10))
-
-        style.configure("TNotebook", background=self.bg, borderwidth=0)
-        style.configure("TNotebook.Tab", padding=(14, 8))
-
-        style.configure("TButton", font=("Segoe UI", 10), padding=(10, 6))
-        style.configure("Primary.TButton", font=("Segoe UI", 10, "bold"), padding=(10, 6))
-
-        style.configure("TEntry", padding=(6, 6))
-        style.configure("TCombobox", padding=(6, 6))
-        style.configure("TLabelframe", background=self.bg)
-        style.configure("TLabelframe.Label", background=self.bg, foreground=self.text, font=("Segoe UI", 10, "bold"))
+        self._styles_done = True
 
     # =========================
     # HOME
@@ -393,7 +717,7 @@ class CartableApp(tk.Tk):
             text="Bienvenue 👋",
             bg=self.panel,
             fg=self.text,
-            font=("Segoe UI", 16, "bold")
+            font=FONT_H2
         ).pack(anchor="w", padx=12, pady=(10, 0))
 
         tk.Label(
@@ -401,7 +725,7 @@ class CartableApp(tk.Tk):
             text="Choisis un module pour commencer.",
             bg=self.panel,
             fg=self.muted,
-            font=("Segoe UI", 11)
+            font=FONT_MUTED
         ).pack(anchor="w", padx=12, pady=(2, 10))
 
         grid = tk.Frame(root, bg=self.panel)
@@ -412,11 +736,11 @@ class CartableApp(tk.Tk):
             f.pack_propagate(False)
 
             head = tk.Label(f, text=f"{emoji}  {title}", bg=self.white, fg=self.text,
-                            font=("Segoe UI", 12, "bold"))
+                            font=FONT_H3)
             head.pack(anchor="w", padx=12, pady=(12, 4))
 
             body = tk.Label(f, text=desc, bg=self.white, fg=self.muted,
-                            font=("Segoe UI", 10), justify="left", wraplength=360)
+                            font=FONT_BODY, justify="left", wraplength=360)
             body.pack(anchor="w", padx=12)
 
             btn = ttk.Button(
@@ -435,10 +759,10 @@ class CartableApp(tk.Tk):
 
             return f
 
-        grid.columnconfigure(0, weight=1, uniform="a")
-        grid.columnconfigure(1, weight=1, uniform="a")
-        grid.rowconfigure(0, weight=1, uniform="b")
-        grid.rowconfigure(1, weight=1, uniform="b")
+        # tailles mini fixes (carte 420x160 + marges) : pas de contrainte "uniform" à résoudre au resize
+        for i in (0, 1):
+            grid.columnconfigure(i, weight=1, minsize=440)
+            grid.rowconfigure(i, weight=1, minsize=180)
 
         c1 = card(grid, "Cloud", "Importer, ouvrir, supprimer des fichiers et les ranger dans des dossiers.",
                   "📁", self.tab_cloud)
@@ -454,18 +778,12 @@ class CartableApp(tk.Tk):
         c3.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
         c4.grid(row=1, column=1, sticky="nsew", padx=10, pady=10)
 
-        for cf in (c1, c2, c3, c4):
-            cf.config(width=420, height=160)
-
     # =========================
     # CLOUD
     # =========================
     def _build_cloud_tab(self):
-        wrap = ScrollableFrame(self.tab_cloud)
-        wrap.pack(fill="both", expand=True)
-        root = wrap.inner
-
-        pad = ttk.Frame(root, padding=12, style="Panel.TFrame")
+        # contenu toujours plus petit que la fenêtre : pas de canvas/scrollbar
+        pad = ttk.Frame(self.tab_cloud, padding=12, style="Panel.TFrame")
         pad.pack(fill="both", expand=True)
 
         left = ttk.Frame(pad, padding=10, style="Card.TFrame")
@@ -476,6 +794,7 @@ class CartableApp(tk.Tk):
         ttk.Label(left, text="Documents", style="Title.TLabel").pack(anchor="w")
         self.docs_list = tk.Listbox(left, height=18)
         self.docs_list.pack(fill="both", expand=True, pady=8)
+        self.docs_list.bind("<<ListboxSelect>>", self._on_doc_select)
 
         btn_row = ttk.Frame(left, style="Card.TFrame")
         btn_row.pack(fill="x", pady=4)
@@ -513,11 +832,19 @@ class CartableApp(tk.Tk):
             messagebox.showerror("Erreur", f"Impossible de lister les documents:\n{e}")
             return
 
+        self._docs_index = docs
         self.docs_list.delete(0, tk.END)
-        for d in docs:
-            name = d.get("name", "")
-            folder = d.get("folder")
-            self.docs_list.insert(tk.END, f"{name}   [{folder}]" if folder else name)
+        self._current_doc_name = None
+        # un seul insert (un seul aller-retour Tcl) pour toute la liste
+        items = [self._doc_label(d) for d in docs]
+        if items:
+            self.docs_list.insert(tk.END, *items)
+
+    @staticmethod
+    def _doc_label(d):
+        name = d.get("name", "")
+        folder = d.get("folder")
+        return f"{name}   [{folder}]" if folder else name
 
     def refresh_folders(self):
         try:
@@ -529,12 +856,12 @@ class CartableApp(tk.Tk):
         if folders:
             self.folders_combo.current(0)
 
-    def _get_selected_doc_name(self):
+    def _on_doc_select(self, _=None):
         sel = self.docs_list.curselection()
-        if not sel:
-            return None
-        item = self.docs_list.get(sel[0])
-        return item.split("   [", 1)[0].strip()
+        self._current_doc_name = self._docs_index[sel[0]].get("name") if sel else None
+
+    def _get_selected_doc_name(self):
+        return self._current_doc_name
 
     def gui_import_document(self):
         path = filedialog.askopenfilename(title="Choisir un fichier à importer")
@@ -579,7 +906,11 @@ class CartableApp(tk.Tk):
         try:
             create_folder(folder)
             self.new_folder_var.set("")
-            self.refresh_folders()
+            # un seul dossier ajouté : pas besoin de relister le disque
+            vals = list(self.folders_combo["values"])
+            if folder not in vals:
+                self.folders_combo["values"] = vals + [folder]
+            self.folders_combo.set(folder)
             messagebox.showinfo("OK", "Dossier créé.")
         except Exception as e:
             messagebox.showerror("Erreur", str(e))
@@ -595,20 +926,28 @@ class CartableApp(tk.Tk):
             return
         try:
             move_document_to_folder(name, folder)
-            self.refresh_cloud()
+            self._patch_doc_rows(name, folder)
             messagebox.showinfo("OK", f"Document rangé dans '{folder}'.")
         except Exception as e:
             messagebox.showerror("Erreur", str(e))
 
+    def _patch_doc_rows(self, name, folder):
+        # met à jour seulement les lignes du document déplacé
+        sel = self.docs_list.curselection()
+        for i, d in enumerate(self._docs_index):
+            if d.get("name") == name:
+                d["folder"] = folder
+                self.docs_list.delete(i)
+                self.docs_list.insert(i, self._doc_label(d))
+        for i in sel:
+            self.docs_list.selection_set(i)
+
     # =========================
     # NOTES
     # =========================
     def _build_notes_tab(self):
-        wrap = ScrollableFrame(self.tab_notes)
-        wrap.pack(fill="both", expand=True)
-        root = wrap.inner
-
-        pad = ttk.Frame(root, padding=12, style="Panel.TFrame")
+        # contenu toujours plus petit que la fenêtre : pas de canvas/scrollbar
+        pad = ttk.Frame(self.tab_notes, padding=12, style="Panel.TFrame")
         pad.pack(fill="both", expand=True)
 
         left = ttk.Frame(pad, padding=10, style="Card.TFrame")
@@ -619,7 +958,7 @@ class CartableApp(tk.Tk):
         ttk.Label(left, text="Mes notes", style="Title.TLabel").pack(anchor="w")
         self.notes_list = tk.Listbox(left, width=34, height=20)
         self.notes_list.pack(fill="y", expand=False, pady=8)
-        self.notes_list.bind("<<ListboxSelect>>", lambda e: self.gui_open_note())
+        self.notes_list.bind("<<ListboxSelect>>", self._on_note_select)
 
         top = ttk.Frame(right, style="Card.TFrame")
         top.pack(fill="x")
@@ -636,6 +975,7 @@ class CartableApp(tk.Tk):
         ttk.Label(right, text="Contenu", style="Title.TLabel").pack(anchor="w", pady=(10, 0))
         self.note_text = tk.Text(right, wrap="word", undo=True)
         self.note_text.pack(fill="both", expand=True, pady=8)
+        self.note_text.bind("<<Modified>>", self._on_note_modified)
 
         self.note_status_var = tk.StringVar(value="Prêt.")
         ttk.Label(right, textvariable=self.note_status_var, style="Muted.TLabel").pack(anchor="w")
@@ -647,15 +987,28 @@ class CartableApp(tk.Tk):
             messagebox.showerror("Erreur", f"Impossible de lister les notes:\n{e}")
             return
 
+        self._notes_index = notes
         self.notes_list.delete(0, tk.END)
-        for n in notes:
-            self.notes_list.insert(tk.END, n.get("title", ""))
+        self._current_note_title = None
+        titles = [n.get("title", "") for n in notes]
+        if titles:
+            self.notes_list.insert(tk.END, *titles)
+        self._known_titles = set(titles)
 
     def _get_selected_note_title(self):
+        return self._current_note_title
+
+    def _on_note_select(self, _=None):
         sel = self.notes_list.curselection()
-        if not sel:
-            return None
-        return self.notes_list.get(sel[0])
+        self._current_note_title = self._notes_index[sel[0]].get("title") if sel else None
+        # flèches haut/bas : on n'ouvre que la sélection finale
+        if self._open_note_after_id:
+            self.after_cancel(self._open_note_after_id)
+        self._open_note_after_id = self.after(150, self._do_open_note)
+
+    def _do_open_note(self):
+        self._open_note_after_id = None
+        self.gui_open_note()
 
     def gui_open_note(self):
         title = self._get_selected_note_title()
@@ -668,18 +1021,41 @@ class CartableApp(tk.Tk):
             messagebox.showerror("Erreur", str(e))
             return
 
-        self.note_text.delete("1.0", tk.END)
-        self.note_text.insert(tk.END, content)
+        # un seul remplacement (une seule mise en page, une entrée d'annulation)
+        self.note_text.replace("1.0", "end-1c", content)
+        self._mark_note_saved(title, content)
         self.note_status_var.set(f"Note ouverte : {title}")
 
+    def _on_note_modified(self, _=None):
+        if self.note_text.edit_modified():
+            self._note_dirty = True
+            self.note_text.edit_modified(False)
+
+    @staticmethod
+    def _note_sig(title, content):
+        return title, len(content), hash(content)
+
+    def _mark_note_saved(self, title, content):
+        self._last_save_sig = self._note_sig(title, content)
+        self._note_dirty = False
+
+    def _note_unchanged(self, title):
+        # aucune frappe depuis la dernière sauvegarde de ce titre -> pas besoin de relire le buffer
+        sig = self._last_save_sig
+        return (not self._note_dirty and not self.note_text.edit_modified()
+                and sig is not None and sig[0] == title)
+
     def gui_create_note(self):
         title = self.note_title_var.get().strip()
-        content = self.note_text.get("1.0", tk.END).strip()
+        # end-1c : sans le saut de ligne final ajouté par Tk
+        content = self.note_text.get("1.0", "end-1c")
         if not title:
             messagebox.showwarning("Attention", "Entre un titre.")
             return
         try:
             create_note(title, content)
+            self._known_titles.add(title)
+            self._mark_note_saved(title, content)
             self.refresh_notes()
             self.note_status_var.set("Note créée ✓")
             messagebox.showinfo("OK", "Note créée.")
@@ -688,19 +1064,23 @@ class CartableApp(tk.Tk):
 
     def gui_update_note(self):
         title = self.note_title_var.get().strip()
-        content = self.note_text.get("1.0", tk.END).strip()
         if not title:
             messagebox.showwarning("Attention", "Entre un titre.")
             return
+        if title in self._known_titles and self._note_unchanged(title):
+            self.note_status_var.set("Enregistré ✓")
+            return
+        content = self.note_text.get("1.0", "end-1c")
         try:
-            titles = [n.get("title") for n in list_notes()]
-            if title in titles:
+            if title in self._known_titles:
                 edit_note(title, content)
                 self.note_status_var.set("Enregistré ✓")
             else:
                 create_note(title, content)
+                self._known_titles.add(title)
                 self.refresh_notes()
                 self.note_status_var.set("Enregistré (créée) ✓")
+            self._mark_note_saved(title, content)
         except Exception as e:
             messagebox.showerror("Erreur", str(e))
 
@@ -713,6 +1093,7 @@ class CartableApp(tk.Tk):
             return
         try:
             delete_note(title)
+            self._known_titles.discard(title)
             self.note_title_var.set("")
             self.note_text.delete("1.0", tk.END)
             self.refresh_notes()
@@ -721,19 +1102,29 @@ class CartableApp(tk.Tk):
         except Exception as e:
             messagebox.showerror("Erreur", str(e))
 
+    def _on_save_shortcut(self, _=None):
+        if self._tab_is_built(self.tab_notes):
+            self.gui_update_note()
+
     def _autosave_notes(self):
+        if not self._tab_is_built(self.tab_notes):
+            self.after(self._autosave_interval_ms, self._autosave_notes)
+            return
         try:
             title = self.note_title_var.get().strip()
-            content = self.note_text.get("1.0", tk.END).strip()
-            if title:
-                titles = [n.get("title") for n in list_notes()]
-                if title in titles:
-                    edit_note(title, content)
-                    self.note_status_var.set("Autosave ✓")
-                else:
-                    create_note(title, content)
-                    self.refresh_notes()
-                    self.note_status_var.set("Autosave (créée) ✓")
+            # rien tapé depuis la dernière sauvegarde -> pas d'écriture disque
+            if title and not (title in self._known_titles and self._note_unchanged(title)):
+                content = self.note_text.get("1.0", "end-1c")
+                if self._note_sig(title, content) != self._last_save_sig:
+                    if title in self._known_titles:
+                        edit_note(title, content)
+                        self.note_status_var.set("Autosave ✓")
+                    else:
+                        create_note(title, content)
+                        self._known_titles.add(title)
+                        self.refresh_notes()
+                        self.note_status_var.set("Autosave (créée) ✓")
+                self._mark_note_saved(title, content)
         except Exception:
             pass
         finally:
@@ -770,7 +1161,8 @@ class CartableApp(tk.Tk):
             textvariable=self.qcm_diff_var
         ).grid(row=0, column=6, padx=6)
 
-        ttk.Button(gen, text="Générer", style="Primary.TButton", command=self.gui_generate_qcm).grid(row=0, column=7, padx=8)
+        self.btn_qcm_generate = ttk.Button(gen, text="Générer", style="Primary.TButton", command=self.gui_generate_qcm)
+        self.btn_qcm_generate.grid(row=0, column=7, padx=8)
         gen.columnconfigure(1, weight=1)
 
         quiz = ttk.LabelFrame(pad, text="Quiz", padding=10)
@@ -785,6 +1177,8 @@ class CartableApp(tk.Tk):
         self.qcm_choice_var = tk.IntVar(value=-1)
         self.qcm_choices_frame = ttk.Frame(quiz)
         self.qcm_choices_frame.pack(fill="x", pady=(0, 10))
+        # boutons réutilisés d'une question à l'autre (agrandi si besoin)
+        self._qcm_rb_pool = [self._new_qcm_radiobutton(i) for i in range(6)]
 
         nav = ttk.Frame(quiz)
         nav.pack(fill="x", pady=(10, 6))
@@ -799,6 +1193,9 @@ class CartableApp(tk.Tk):
                                      command=self.qcm_finish, state="disabled")
         self.btn_finish.pack(side="left", padx=10)
 
+        # dernier état appliqué à chaque bouton de navigation
+        self._qcm_btn_state = {"prev": "disabled", "next": "disabled", "finish": "disabled"}
+
         ttk.Separator(quiz).pack(fill="x", pady=10)
 
         ttk.Label(quiz, text="Correction / Résultat", style="Title.TLabel").pack(anchor="w")
@@ -825,8 +1222,17 @@ class CartableApp(tk.Tk):
             return
 
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                text = f.read().strip()
+            size = os.path.getsize(path)
+            if size > MAX_QCM_BYTES:
+                messagebox.showerror(
+                    "Erreur",
+                    f"Fichier trop volumineux ({size // 1024} Ko, max {MAX_QCM_BYTES // 1024} Ko).",
+                )
+                return
+            with open(path, "rb") as f:
+                raw = f.read(MAX_QCM_BYTES)
+            # fins de ligne comme en mode texte : \r\n et \r seul (ancien Mac) -> \n
+            text = raw.decode("utf-8", errors="replace").replace("\r\n", "\n").replace("\r", "\n").strip()
             if not text:
                 messagebox.showwarning("Attention", "Le fichier est vide.")
                 return
@@ -836,17 +1242,29 @@ class CartableApp(tk.Tk):
 
             self.qcm_status.set("⏳ Génération IA en cours…")
             self._set_qcm_enabled(False)
-            self.update_idletasks()
-
-            raw = generate_qcm_quiz(text, n=n, difficulty=diff)
+            self.btn_qcm_generate.config(state="disabled")
 
-            # 1) JSON
-            data = _normalize_qcm(_extract_json_obj(raw))
+            # appel IA dans un thread : la fenêtre reste réactive pendant la génération
+            self._run_in_background(
+                generate_qcm_quiz, text, n=n, difficulty=diff,
+                on_done=self._on_qcm_generated,
+                on_error=self._qcm_generation_failed,
+            )
 
-            # 2) fallback texte (IMPORTANT pour ton cas !)
-            if not data:
-                data = _normalize_qcm(_parse_qcm_from_text(raw))
+        except Exception as e:
+            self._qcm_generation_failed(e)
+
+    def _on_qcm_generated(self, raw):
+        # parsing dans un thread : l'interface reste fluide sur les grosses réponses
+        self._run_in_background(
+            _parse_qcm_pipeline, raw,
+            on_done=self._on_qcm_parsed,
+            on_error=self._qcm_generation_failed,
+            pool=_PARSE_POOL,
+        )
 
+    def _on_qcm_parsed(self, data):
+        try:
             if not data:
                 raise ValueError("Impossible de parser le QCM (format inattendu).")
 
@@ -854,8 +1272,8 @@ class CartableApp(tk.Tk):
             self.qcm_index = 0
             self.qcm_user_answers = {}
 
-            self.qcm_status.set(f"QCM généré : {len(self.qcm_data['questions'])} question(s).")
-            self._set_qcm_enabled(True)
+            self.qcm_status.set(f"QCM généré : {len(self.qcm_data['question'])} question(s).")
+            self.btn_qcm_generate.config(state="normal")
             self.qcm_render_question()
 
             self.qcm_correction.config(state="normal")
@@ -864,46 +1282,63 @@ class CartableApp(tk.Tk):
             self.qcm_correction.config(state="disabled")
 
         except Exception as e:
-            self.qcm_status.set("Aucun QCM généré.")
-            self._set_qcm_enabled(False)
-            messagebox.showerror("Erreur QCM", str(e))
+            self._qcm_generation_failed(e)
+
+    def _qcm_generation_failed(self, e):
+        self.qcm_status.set("Aucun QCM généré.")
+        self._set_qcm_enabled(False)
+        self.btn_qcm_generate.config(state="normal")
+        messagebox.showerror("Erreur QCM", str(e))
 
     def _set_qcm_enabled(self, enabled: bool):
         if enabled and self.qcm_data:
-            self.btn_prev.config(state=("disabled" if self.qcm_index == 0 else "normal"))
-            self.btn_next.config(state=("normal" if self.qcm_index < len(self.qcm_data["questions"]) - 1 else "disabled"))
-            self.btn_finish.config(state="normal")
+            wanted = {
+                "prev": "disabled" if self.qcm_index == 0 else "normal",
+                "next": "normal" if self.qcm_index < len(self.qcm_data["question"]) - 1 else "disabled",
+                "finish": "normal",
+            }
         else:
-            self.btn_prev.config(state="disabled")
-            self.btn_next.config(state="disabled")
-            self.btn_finish.config(state="disabled")
+            wanted = {"prev": "disabled", "next": "disabled", "finish": "disabled"}
+
+        # on ne reconfigure que les boutons dont l'état change
+        cache = self._qcm_btn_state
+        for key, state in wanted.items():
+            if cache[key] != state:
+                getattr(self, "btn_" + key).config(state=state)
+                cache[key] = state
 
     def qcm_render_question(self):
         if not self.qcm_data:
             return
 
-        qs = self.qcm_data["questions"]
-        q = qs[self.qcm_index]
-
-        self.qcm_question_lbl.config(text=f"Question {self.qcm_index + 1}/{len(qs)}\n\n{q['question']}")
+        qcm = self.qcm_data
+        idx = self.qcm_index
 
-        for w in self.qcm_choices_frame.winfo_children():
-            w.destroy()
+        self.qcm_question_lbl.config(text=f"Question {idx + 1}/{len(qcm['question'])}\n\n{qcm['question'][idx]}")
 
         self.qcm_choice_var.set(self.qcm_user_answers.get(self.qcm_index, -1))
 
-        for i, opt in enumerate(q["options"]):
-            rb = ttk.Radiobutton(
-                self.qcm_choices_frame,
-                text=opt,
-                variable=self.qcm_choice_var,
-                value=i,
-                command=self.qcm_save_choice
-            )
-            rb.pack(anchor="w", pady=2)
+        options = qcm["options"][idx]
+        while len(self._qcm_rb_pool) < len(options):
+            self._qcm_rb_pool.append(self._new_qcm_radiobutton(len(self._qcm_rb_pool)))
+
+        for i, rb in enumerate(self._qcm_rb_pool):
+            if i < len(options):
+                rb.config(text=options[i])
+                rb.pack(anchor="w", pady=2)
+            else:
+                rb.pack_forget()
 
         self._set_qcm_enabled(True)
 
+    def _new_qcm_radiobutton(self, i):
+        return ttk.Radiobutton(
+            self.qcm_choices_frame,
+            variable=self.qcm_choice_var,
+            value=i,
+            command=self.qcm_save_choice
+        )
+
     def qcm_save_choice(self):
         val = self.qcm_choice_var.get()
         if val >= 0:
@@ -921,7 +1356,7 @@ class CartableApp(tk.Tk):
         if not self.qcm_data:
             return
         self.qcm_save_choice()
-        if self.qcm_index < len(self.qcm_data["questions"]) - 1:
+        if self.qcm_index < len(self.qcm_data["question"]) - 1:
             self.qcm_index += 1
         self.qcm_render_question()
 
@@ -930,32 +1365,37 @@ class CartableApp(tk.Tk):
             return
         self.qcm_save_choice()
 
-        qs = self.qcm_data["questions"]
-        total = len(qs)
+        qcm = self.qcm_data
+        total = len(qcm["question"])
+        answers = self.qcm_user_answers
         score = 0
-        lines = []
-
-        for idx, q in enumerate(qs):
-            options = q["options"]
-            correct_idx = _answer_to_index(q.get("answer"), options)
-            user_idx = self.qcm_user_answers.get(idx)
-
-            ok = (correct_idx is not None and user_idx == correct_idx)
-            if ok:
-                score += 1
-
-            lines.append(f"Q{idx+1}: {q['question']}")
-            lines.append(f"Ta réponse : {options[user_idx]}" if user_idx is not None else "Ta réponse : (aucune)")
-            lines.append(f"Bonne réponse : {options[correct_idx]}" if correct_idx is not None else "Bonne réponse : (inconnue)")
-            if q.get("explanation"):
-                lines.append(f"Explication : {q['explanation']}")
-            lines.append("-" * 60)
 
+        def _build():
+            # lignes produites à la demande : ni liste ni tampon intermédiaire
+            nonlocal score
+            for idx, (question, options, answer, explanation) in enumerate(
+                zip(qcm["question"], qcm["options"], qcm["answer"], qcm["explanation"])
+            ):
+                correct_idx = _answer_to_index(answer, options)
+                user_idx = answers.get(idx)
+                if correct_idx is not None and user_idx == correct_idx:
+                    score += 1
+
+                if idx:
+                    yield "-" * 60
+                yield f"Q{idx+1}: {question}"
+                yield f"Ta réponse : {options[user_idx]}" if user_idx is not None else "Ta réponse : (aucune)"
+                yield f"Bonne réponse : {options[correct_idx]}" if correct_idx is not None else "Bonne réponse : (inconnue)"
+                if explanation:
+                    yield f"Explication : {explanation}"
+            if total:
+                yield "-" * 60
+
+        text = "\n".join(_build())
         self.qcm_status.set(f"Terminé — Score : {score}/{total}")
 
         self.qcm_correction.config(state="normal")
-        self.qcm_correction.delete("1.0", tk.END)
-        self.qcm_correction.insert("1.0", "\n".join(lines))
+        self.qcm_correction.replace("1.0", "end-1c", text)
         self.qcm_correction.config(state="disabled")
 
     # =========================
@@ -977,37 +1417,33 @@ class CartableApp(tk.Tk):
         form = ttk.LabelFrame(left, text="Assistant CV (IA)", padding=10)
         form.pack(fill="x")
 
-        self.cv_name = tk.StringVar()
-        self.cv_target_title = tk.StringVar(value="Étudiant / Junior")
-        self.cv_contact = tk.StringVar(value="email | téléphone | ville | LinkedIn")
-
-        self.cv_profile_raw = tk.StringVar()
-        self.cv_edu_raw = tk.StringVar()
-        self.cv_skills_raw = tk.StringVar()
-        self.cv_exp_raw = tk.StringVar()
-        self.cv_projects_raw = tk.StringVar()
-        self.cv_lang_raw = tk.StringVar()
-        self.cv_interests_raw = tk.StringVar()
-
-        def row(label, var):
-            r = ttk.Frame(form)
-            r.pack(fill="x", pady=2)
-            ttk.Label(r, text=label, width=16).pack(side="left")
-            ttk.Entry(r, textvariable=var, width=36).pack(side="left", fill="x", expand=True)
-
-        row("Nom", self.cv_name)
-        row("Titre visé", self.cv_target_title)
-        row("Contact", self.cv_contact)
-
-        ttk.Separator(form).pack(fill="x", pady=8)
-
-        row("Profil (brut)", self.cv_profile_raw)
-        row("Formation (brut)", self.cv_edu_raw)
-        row("Compétences (brut)", self.cv_skills_raw)
-        row("Expérience (brut)", self.cv_exp_raw)
-        row("Projets (brut)", self.cv_projects_raw)
-        row("Langues (brut)", self.cv_lang_raw)
-        row("Intérêts", self.cv_interests_raw)
+        # champs lus seulement à la génération : Entry.get() plutôt qu'une StringVar par champ
+        self._cv_entries = {}
+
+        # une seule grille libellé | champ (pas de Frame par ligne)
+        form.columnconfigure(1, weight=1)
+
+        def row(i, key, label, default=""):
+            ttk.Label(form, text=label, width=16).grid(row=i, column=0, sticky="w", pady=2)
+            e = ttk.Entry(form, width=36)
+            e.grid(row=i, column=1, sticky="ew", pady=2)
+            if default:
+                e.insert(0, default)
+            self._cv_entries[key] = e
+
+        row(0, "name", "Nom")
+        row(1, "target_title", "Titre visé", "Étudiant / Junior")
+        row(2, "contact", "Contact", "email | téléphone | ville | LinkedIn")
+
+        ttk.Separator(form).grid(row=3, column=0, columnspan=2, sticky="ew", pady=8)
+
+        row(4, "profile", "Profil (brut)")
+        row(5, "education", "Formation (brut)")
+        row(6, "skills", "Compétences (brut)")
+        row(7, "experience", "Expérience (brut)")
+        row(8, "projects", "Projets (brut)")
+        row(9, "languages", "Langues (brut)")
+        row(10, "interests", "Intérêts")
 
         style = ttk.LabelFrame(left, text="Style", padding=10)
         style.pack(fill="x", pady=10)
@@ -1034,16 +1470,19 @@ class CartableApp(tk.Tk):
         ttk.Button(style, text="Choisir photo…", command=self.gui_choose_cv_photo).pack(fill="x", pady=4)
 
         ttk.Button(style, text="Nouveau CV (réinitialiser)", command=self.gui_reset_cv).pack(fill="x", pady=(8, 4))
-        ttk.Button(style, text="Générer CV (IA)", style="Primary.TButton", command=self.gui_generate_cv_ai).pack(fill="x", pady=4)
-        ttk.Button(style, text="Exporter PDF", command=self.gui_export_cv_pdf_from_ai).pack(fill="x")
+        self.btn_cv_generate = ttk.Button(style, text="Générer CV (IA)", style="Primary.TButton", command=self.gui_generate_cv_ai)
+        self.btn_cv_generate.pack(fill="x", pady=4)
+        self.btn_cv_export = ttk.Button(style, text="Exporter PDF", command=self.gui_export_cv_pdf_from_ai)
+        self.btn_cv_export.pack(fill="x")
 
         preview_frame = ttk.LabelFrame(right, text="Prévisualisation", padding=10)
         preview_frame.pack(fill="both", expand=True)
 
         self.cv_canvas = tk.Canvas(preview_frame, bg="white", highlightthickness=1, highlightbackground=self.border)
         self.cv_canvas.pack(fill="both", expand=True)
+        self.cv_canvas.bind("<Configure>", self._schedule_redraw)
 
-        self.draw_cv_preview()
+        self._schedule_redraw()
 
         interview_frame = ttk.LabelFrame(right, text="Coach d’entretien", padding=10)
         interview_frame.pack(fill="both", expand=True, pady=10)
@@ -1051,9 +1490,10 @@ class CartableApp(tk.Tk):
         top = ttk.Frame(interview_frame)
         top.pack(fill="x")
         ttk.Label(top, text="Poste visé:", width=12).pack(side="left")
-        self.job_var = tk.StringVar()
-        ttk.Entry(top, textvariable=self.job_var).pack(side="left", fill="x", expand=True, padx=6)
-        ttk.Button(top, text="Nouvelle question", command=self.gui_new_question).pack(side="left", padx=4)
+        self.job_entry = ttk.Entry(top)
+        self.job_entry.pack(side="left", fill="x", expand=True, padx=6)
+        self.btn_new_question = ttk.Button(top, text="Nouvelle question", command=self.gui_new_question)
+        self.btn_new_question.pack(side="left", padx=4)
 
         ttk.Label(interview_frame, text="Question").pack(anchor="w", pady=(10, 0))
         self.question_box = tk.Text(interview_frame, height=4, wrap="word")
@@ -1063,15 +1503,22 @@ class CartableApp(tk.Tk):
         self.answer_box = tk.Text(interview_frame, height=6, wrap="word")
         self.answer_box.pack(fill="x", pady=4)
 
-        ttk.Button(interview_frame, text="Obtenir feedback", style="Primary.TButton", command=self.gui_feedback).pack(pady=6)
+        self.btn_feedback = ttk.Button(interview_frame, text="Obtenir feedback", style="Primary.TButton",
+                                       command=self.gui_feedback)
+        self.btn_feedback.pack(pady=6)
 
         ttk.Label(interview_frame, text="Feedback").pack(anchor="w", pady=(10, 0))
         self.feedback_box = tk.Text(interview_frame, wrap="word")
         self.feedback_box.pack(fill="both", expand=True, pady=4)
 
+    def _set_cv_ai(self, cv):
+        self.cv_ai = cv
+        p = cv.get("profile", "") if isinstance(cv, dict) else ""
+        self._profile_display = p[:600] + "..." if len(p) > 600 else p
+
     def gui_reset_cv(self):
-        self.cv_ai = None
-        self.draw_cv_preview()
+        self._set_cv_ai(None)
+        self._schedule_redraw()
         messagebox.showinfo("OK", "Tu peux modifier les champs puis régénérer le CV.")
 
     def gui_pick_cv_color(self):
@@ -1079,7 +1526,7 @@ class CartableApp(tk.Tk):
         if hex_color:
             self.cv_color.set(hex_color)
             self.color_preview.configure(bg=hex_color)
-            self.draw_cv_preview()
+            self._schedule_redraw()
 
     def gui_choose_cv_photo(self):
         path = filedialog.askopenfilename(
@@ -1090,78 +1537,105 @@ class CartableApp(tk.Tk):
             self.cv_photo_path.set(path)
 
     def gui_generate_cv_ai(self):
-        name = self.cv_name.get().strip()
-        if not name:
+        data = {k: e.get().strip() for k, e in self._cv_entries.items()}
+        if not data["name"]:
             messagebox.showwarning("Attention", "Le nom est obligatoire.")
             return
 
-        data = {
-            "name": name,
-            "target_title": self.cv_target_title.get().strip(),
-            "contact": self.cv_contact.get().strip(),
-            "profile": self.cv_profile_raw.get().strip(),
-            "education": self.cv_edu_raw.get().strip(),
-            "skills": self.cv_skills_raw.get().strip(),
-            "experience": self.cv_exp_raw.get().strip(),
-            "projects": self.cv_projects_raw.get().strip(),
-            "languages": self.cv_lang_raw.get().strip(),
-            "interests": self.cv_interests_raw.get().strip(),
-        }
+        self._cv_generating = True
+        self.draw_cv_preview()
+        self.btn_cv_generate.config(state="disabled")
 
-        try:
-            self.cv_canvas.delete("all")
-            self.cv_canvas.create_text(20, 20, anchor="nw", text="⏳ Génération IA en cours...", font=("Segoe UI", 14))
-            self.update_idletasks()
+        self._run_in_background(
+            generate_cv_structured, data,
+            on_done=self._on_cv_generated,
+            on_error=self._on_cv_generation_failed,
+        )
 
-            self.cv_ai = generate_cv_structured(data)
-            self.draw_cv_preview()
-            messagebox.showinfo("OK", "CV généré par l’IA ✅")
-        except Exception as e:
-            messagebox.showerror("Erreur IA", str(e))
+    def _on_cv_generated(self, cv):
+        self._cv_generating = False
+        self.btn_cv_generate.config(state="normal")
+        self._set_cv_ai(cv)
+        self.draw_cv_preview()
+        messagebox.showinfo("OK", "CV généré par l’IA ✅")
+
+    def _on_cv_generation_failed(self, e):
+        self._cv_generating = False
+        self.btn_cv_generate.config(state="normal")
+        self.draw_cv_preview()
+        messagebox.showerror("Erreur IA", str(e))
+
+    def _schedule_redraw(self, _=None):
+        # une rafale de <Configure> (redimensionnement) -> un seul dessin 20 ms après le dernier
+        if self._redraw_pending:
+            self.after_cancel(self._redraw_pending)
+        self._redraw_pending = self.after(20, self._do_redraw)
+
+    def _do_redraw(self):
+        self._redraw_pending = None
+        self.draw_cv_preview()
 
     def draw_cv_preview(self):
         c = self.cv_canvas
-        c.delete("all")
 
         w = c.winfo_width() or 900
         h = c.winfo_height() or 500
 
+        # pendant la génération, un redimensionnement ne doit pas remettre l'ancien CV
+        if self._cv_generating:
+            if self._preview_sig != "busy":
+                self._preview_sig = "busy"
+                c.delete("all")
+                c.create_text(20, 20, anchor="nw", text="⏳ Génération IA en cours...", font=FONT_LARGE)
+            return
+
+        cv = self.cv_ai if isinstance(self.cv_ai, dict) else None
+        if cv:
+            header = cv.get("header", {})
+            name = header.get("full_name", self._cv_entries["name"].get().strip())
+            title = header.get("title", self._cv_entries["target_title"].get().strip())
+            contact = header.get("contact", self._cv_entries["contact"].get().strip())
+            accent = (self.cv_color.get().strip() or "#6A7BFF")
+            profile = self._profile_display
+            sig = (w, h, accent, name, title, contact, profile)
+        else:
+            sig = (w, h)
+
+        # même taille, mêmes textes, même couleur : l'aperçu affiché est déjà le bon
+        if sig == self._preview_sig:
+            return
+        self._preview_sig = sig
+
+        c.delete("all")
+
         x0, y0 = 40, 40
         page_w, page_h = w - 80, h - 80
 
         c.create_rectangle(x0, y0, x0 + page_w, y0 + page_h, fill="white", outline="#ccc")
 
-        if not self.cv_ai or not isinstance(self.cv_ai, dict):
+        if not cv:
             c.create_text(
                 x0 + 20, y0 + 20,
                 anchor="nw",
                 text="Clique sur « Générer CV (IA) » pour voir l’aperçu",
-                font=("Segoe UI", 14),
+                font=FONT_LARGE,
                 fill=self.muted
             )
             return
 
-        header = self.cv_ai.get("header", {})
-        name = header.get("full_name", self.cv_name.get().strip())
-        title = header.get("title", self.cv_target_title.get().strip())
-        contact = header.get("contact", self.cv_contact.get().strip())
-
-        accent = (self.cv_color.get().strip() or "#6A7BFF")
-
         c.create_rectangle(x0, y0, x0 + page_w, y0 + 100, fill=accent, outline="")
-        c.create_text(x0 + 20, y0 + 18, anchor="nw", text=name, fill="white", font=("Segoe UI", 20, "bold"))
-        c.create_text(x0 + 20, y0 + 52, anchor="nw", text=title, fill="white", font=("Segoe UI", 12))
-        c.create_text(x0 + 20, y0 + 76, anchor="nw", text=contact, fill="white", font=("Segoe UI", 10))
+        c.create_text(x0 + 20, y0 + 18, anchor="nw", text=name, fill="white", font=FONT_CV_NAME)
+        c.create_text(x0 + 20, y0 + 52, anchor="nw", text=title, fill="white", font=FONT_LEAD)
+        c.create_text(x0 + 20, y0 + 76, anchor="nw", text=contact, fill="white", font=FONT_BODY)
 
         y = y0 + 120
-        profile = self.cv_ai.get("profile", "")
-        c.create_text(x0 + 20, y, anchor="nw", text="Profil", font=("Segoe UI", 12, "bold"), fill=self.text)
+        c.create_text(x0 + 20, y, anchor="nw", text="Profil", font=FONT_H3, fill=self.text)
         y += 22
         c.create_text(
             x0 + 20, y, anchor="nw",
-            text=profile[:600] + ("..." if len(profile) > 600 else ""),
+            text=profile,
             width=page_w - 40,
-            font=("Segoe UI", 10),
+            font=FONT_BODY,
             fill=self.text
         )
 
@@ -1171,9 +1645,9 @@ class CartableApp(tk.Tk):
             return
 
         header = self.cv_ai.get("header", {})
-        full_name = header.get("full_name", self.cv_name.get().strip())
-        title_line = header.get("title", self.cv_target_title.get().strip())
-        contact = header.get("contact", self.cv_contact.get().strip())
+        full_name = header.get("full_name", self._cv_entries["name"].get().strip())
+        title_line = header.get("title", self._cv_entries["target_title"].get().strip())
+        contact = header.get("contact", self._cv_entries["contact"].get().strip())
 
         template = self.cv_template.get().strip()
         accent = self.cv_color.get().strip()
@@ -1183,14 +1657,14 @@ class CartableApp(tk.Tk):
         education = "\n".join(self.cv_ai.get("education", []))
         skills = "\n".join(self.cv_ai.get("skills", []))
 
-        exp_blocks = []
-        for e in self.cv_ai.get("experience", []):
-            head = f"{e.get('title','')} - {e.get('company','')} ({e.get('dates','')})".strip()
-            exp_blocks.append(head)
-            for b in e.get("bullets", []):
-                exp_blocks.append(f"• {b}")
-            exp_blocks.append("")
-        experience = "\n".join(exp_blocks).strip()
+        # un bloc par expérience (en-tête + puces), blocs séparés par une ligne vide
+        experience = "\n\n".join(
+            "\n".join([
+                f"{e.get('title','')} - {e.get('company','')} ({e.get('dates','')})".strip(),
+                *(f"• {b}" for b in e.get("bullets", [])),
+            ])
+            for e in self.cv_ai.get("experience", [])
+        ).strip()
 
         projects = "\n".join(self.cv_ai.get("projects", []))
         languages = "\n".join(self.cv_ai.get("languages", []))
@@ -1215,54 +1689,79 @@ class CartableApp(tk.Tk):
         if not path:
             return
 
-        try:
-            export_cv_pdf(
-                path,
-                template=template,
-                accent_hex=accent,
-                photo_path=photo,   # None ok
-                full_name=full_name,
-                title_line=title_line,
-                contact=contact,
-                sections=sections
-            )
-            messagebox.showinfo("OK", "CV exporté en PDF ✅")
-        except Exception as e:
-            messagebox.showerror("Erreur export PDF", str(e))
+        self.btn_cv_export.config(state="disabled")
+        self._run_in_background(
+            export_cv_pdf,
+            path,
+            template=template,
+            accent_hex=accent,
+            photo_path=photo,   # None ok
+            full_name=full_name,
+            title_line=title_line,
+            contact=contact,
+            sections=sections,
+            on_done=self._on_cv_exported,
+            on_error=self._on_cv_export_failed,
+        )
+
+    def _on_cv_exported(self, _):
+        self.btn_cv_export.config(state="normal")
+        messagebox.showinfo("OK", "CV exporté en PDF ✅")
+
+    def _on_cv_export_failed(self, e):
+        self.btn_cv_export.config(state="normal")
+        messagebox.showerror("Erreur export PDF", str(e))
 
     def gui_new_question(self):
-        job = self.job_var.get().strip()
+        job = self.job_entry.get().strip()
         if not job:
             messagebox.showwarning("Attention", "Entre un poste visé.")
             return
-        try:
-            self.question_box.delete("1.0", tk.END)
-            self.question_box.insert(tk.END, "⏳ Génération...\n")
-            self.update_idletasks()
-            q = interview_question(job)
-            self.question_box.delete("1.0", tk.END)
-            self.question_box.insert(tk.END, q)
-        except Exception as e:
-            messagebox.showerror("Erreur", str(e))
+        self.question_box.delete("1.0", tk.END)
+        self.question_box.insert(tk.END, "⏳ Génération...\n")
+        self.btn_new_question.config(state="disabled")
+
+        # appel IA hors du thread Tk
+        self._run_in_background(
+            interview_question, job,
+            on_done=self._on_question_ready,
+            on_error=self._on_question_failed,
+        )
+
+    def _on_question_ready(self, q):
+        self.btn_new_question.config(state="normal")
+        self.question_box.replace("1.0", "end-1c", q)
+
+    def _on_question_failed(self, e):
+        self.btn_new_question.config(state="normal")
+        messagebox.showerror("Erreur", str(e))
 
     def gui_feedback(self):
-        job = self.job_var.get().strip()
-        answer = self.answer_box.get("1.0", tk.END).strip()
+        job = self.job_entry.get().strip()
+        answer = self.answer_box.get("1.0", "end-1c").strip()
         if not job:
             messagebox.showwarning("Attention", "Entre un poste visé.")
             return
         if not answer:
             messagebox.showwarning("Attention", "Écris une réponse.")
             return
-        try:
-            self.feedback_box.delete("1.0", tk.END)
-            self.feedback_box.insert(tk.END, "⏳ Analyse...\n")
-            self.update_idletasks()
-            fb = interview_feedback(job, answer)
-            self.feedback_box.delete("1.0", tk.END)
-            self.feedback_box.insert(tk.END, fb)
-        except Exception as e:
-            messagebox.showerror("Erreur", str(e))
+        self.feedback_box.delete("1.0", tk.END)
+        self.feedback_box.insert(tk.END, "⏳ Analyse...\n")
+        self.btn_feedback.config(state="disabled")
+
+        self._run_in_background(
+            interview_feedback, job, answer,
+            on_done=self._on_feedback_ready,
+            on_error=self._on_feedback_failed,
+        )
+
+    def _on_feedback_ready(self, fb):
+        self.btn_feedback.config(state="normal")
+        self.feedback_box.replace("1.0", "end-1c", fb)
+
+    def _on_feedback_failed(self, e):
+        self.btn_feedback.config(state="normal")
+        messagebox.showerror("Erreur", str(e))
 
 
 if __name__ == "__main__":
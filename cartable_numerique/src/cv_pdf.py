@@ -3,13 +3,51 @@ from reportlab.lib.units import cm
 from reportlab.lib import colors
 from reportlab.pdfgen import canvas
 import os
+import functools
+from itertools import accumulate
 
 
+@functools.lru_cache(maxsize=64)
 def _hex_to_rgb(hex_color):
     hex_color = hex_color.lstrip("#")
     return tuple(int(hex_color[i:i+2], 16)/255 for i in (0, 2, 4))
 
 
+def _wrap_line(text, max_width, cw):
+    """
+    Coupe une ligne trop large en morceaux qui tiennent dans max_width.
+    On estime la longueur d'un morceau avec la largeur d'un caractère,
+    puis on ajuste de quelques caractères. cw(ch) donne la largeur d'un
+    caractère : les largeurs de morceaux sont des différences de sommes
+    cumulées, sans re-mesurer de sous-chaîne.
+    """
+    pos = list(accumulate(map(cw, text), initial=0))
+    if pos[-1] <= max_width:
+        return [text]
+
+    est = max(1, int(max_width // cw("a")))
+    out = []
+    i, n = 0, len(text)
+    while i < n:
+        j = min(n, i + est)
+        # trop large : on recule
+        while j > i + 1 and pos[j] - pos[i] > max_width:
+            j -= 1
+        # encore de la place : on avance
+        while j < n and pos[j + 1] - pos[i] <= max_width:
+            j += 1
+        # couper de préférence sur un espace
+        if j < n and text[j] != " ":
+            k = text.rfind(" ", i + 1, j)
+            if k > i:
+                j = k
+        out.append(text[i:j].rstrip())
+        i = j
+        while i < n and text[i] == " ":
+            i += 1
+    return out
+
+
 def export_cv_pdf(
     path,
     *,
@@ -53,14 +91,29 @@ def export_cv_pdf(
         y = h - 4.5*cm
 
     c.setFillColor(colors.black)
+    text_width = w - 2 * margin
+
+    # largeur par caractère (Helvetica 10), mesurée une fois pour tout le document
+    _char_width = {}
+
+    def cw(ch):
+        v = _char_width.get(ch)
+        if v is None:
+            v = _char_width[ch] = c.stringWidth(ch, "Helvetica", 10)
+        return v
+
     for title, content in sections:
         c.setFont("Helvetica-Bold", 12)
         c.drawString(margin, y, title)
         y -= 0.5*cm
-        c.setFont("Helvetica", 10)
+        # un seul objet texte par section (au lieu d'un drawString par ligne)
+        t = c.beginText(margin, y)
+        t.setFont("Helvetica", 10, leading=0.4*cm)
+        lines = []
         for line in content.split("\n"):
-            c.drawString(margin, y, line)
-            y -= 0.4*cm
-        y -= 0.4*cm
+            lines.extend(_wrap_line(line, text_width, cw))
+        t.textLines(lines)
+        c.drawText(t)
+        y = t.getY() - 0.4*cm
 
     c.save()
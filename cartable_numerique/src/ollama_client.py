@@ -1,24 +1,61 @@
+import os
 import json
+import hashlib
 import subprocess
+import threading
 import re
+import urllib.error
+import urllib.request
+
+
+# CARTABLE_DEBUG=1 : garde la réponse brute de chaque génération de CV (debug_cv_raw.txt)
+_DEBUG = os.environ.get("CARTABLE_DEBUG") == "1"
 
 
 # =========================================================
 # OLLAMA CORE
 # =========================================================
 
-def ask_ollama(prompt, model="llama3.1"):
-    """
-    Appelle Ollama via la CLI.
-    """
+# API HTTP du démon Ollama : le modèle reste chargé entre deux appels
+OLLAMA_API_URL = "http://127.0.0.1:11434/api/generate"
+OLLAMA_TIMEOUT = 300  # secondes (une génération longue sur CPU peut dépasser 2 min)
+# durée pendant laquelle le démon garde le modèle chargé après un appel (défaut Ollama : 5 min)
+OLLAMA_KEEP_ALIVE = "30m"
+
+
+def _ask_ollama_http(prompt, model):
+    body = json.dumps({
+        "model": model,
+        "prompt": prompt,
+        "stream": False,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+    }).encode("utf-8")
+    req = urllib.request.Request(
+        OLLAMA_API_URL,
+        data=body,
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(req, timeout=OLLAMA_TIMEOUT) as resp:
+        payload = json.loads(resp.read().decode("utf-8"))
+    return (payload.get("response") or "").strip()
+
+
+def _run_ollama_cli(args, prompt):
+    return subprocess.run(
+        ["ollama", "run", *args],
+        input=prompt,
+        text=True,
+        capture_output=True,
+        encoding="utf-8"
+    )
+
+
+def _ask_ollama_cli(prompt, model):
     try:
-        result = subprocess.run(
-            ["ollama", "run", model],
-            input=prompt,
-            text=True,
-            capture_output=True,
-            encoding="utf-8"
-        )
+        # --keepalive : le modèle reste chargé pour les appels suivants (processus relancé, pas le modèle)
+        result = _run_ollama_cli(["--keepalive", OLLAMA_KEEP_ALIVE, model], prompt)
+        if result.returncode != 0 and "unknown flag" in (result.stderr or ""):
+            result = _run_ollama_cli([model], prompt)  # ancienne version d'Ollama
 
         out = (result.stdout or "").strip()
         err = (result.stderr or "").strip()
@@ -34,10 +71,106 @@ def ask_ollama(prompt, model="llama3.1"):
         raise RuntimeError(f"Erreur Ollama: {e}")
 
 
+def ask_ollama(prompt, model="llama3.1"):
+    """
+    Appelle Ollama via son API HTTP locale, ou via la CLI si le démon ne répond pas.
+    """
+    try:
+        out = _ask_ollama_http(prompt, model)
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            # modèle pas encore téléchargé : "ollama run" le récupère tout seul
+            return _ask_ollama_cli(prompt, model)
+        raise RuntimeError(f"Erreur Ollama: HTTP {e.code} {e.reason}")
+    except (urllib.error.URLError, ConnectionError):
+        # démon injoignable (pas lancé, autre port...) : fallback CLI
+        return _ask_ollama_cli(prompt, model)
+    except Exception as e:
+        raise RuntimeError(f"Erreur Ollama: {e}")
+
+    if not out:
+        raise RuntimeError("Ollama n'a rien renvoyé.")
+    return out
+
+
+# =========================================================
+# CACHE DES RÉPONSES (même prompt + même modèle -> même réponse)
+# =========================================================
+
+LLM_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "cartable", "llm")
+_LLM_CACHE_MAX = 64
+_llm_cache = {}  # clé -> réponse, ordre d'insertion = ordre d'éviction (FIFO)
+_llm_cache_lock = threading.Lock()  # appels IA lancés depuis les threads de l'interface
+
+
+def _prompt_key(prompt, model):
+    return hashlib.blake2b(f"{model}\0{prompt}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _cache_path(key):
+    return os.path.join(LLM_CACHE_DIR, key + ".json")
+
+
+def _remember(key, out):
+    with _llm_cache_lock:
+        _llm_cache[key] = out
+        while len(_llm_cache) > _LLM_CACHE_MAX:
+            del _llm_cache[next(iter(_llm_cache))]
+
+
+def ask_ollama_cached(prompt, model="llama3.1"):
+    """
+    Comme ask_ollama, mais réutilise la réponse d'un prompt identique
+    (mémoire, puis disque pour survivre au redémarrage).
+    """
+    key = _prompt_key(prompt, model)
+    out = _llm_cache.get(key)
+    if out is not None:
+        return out
+
+    try:
+        with open(_cache_path(key), "r", encoding="utf-8") as f:
+            out = json.load(f)["response"]
+    except (OSError, ValueError, KeyError, TypeError):
+        out = None
+
+    if not isinstance(out, str):
+        out = ask_ollama(prompt, model=model)
+        try:
+            os.makedirs(LLM_CACHE_DIR, exist_ok=True)
+            tmp = _cache_path(key) + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"model": model, "response": out}, f, ensure_ascii=False)
+            os.replace(tmp, _cache_path(key))
+        except OSError:
+            pass  # cache disque facultatif
+
+    _remember(key, out)
+    return out
+
+
+def _forget_cached(prompt, model="llama3.1"):
+    """
+    Oublie une réponse en cache (ex. JSON inexploitable : on veut pouvoir relancer).
+    """
+    key = _prompt_key(prompt, model)
+    with _llm_cache_lock:
+        _llm_cache.pop(key, None)
+    try:
+        os.remove(_cache_path(key))
+    except OSError:
+        pass
+
+
 # =========================================================
 # JSON EXTRACTION & CLEANING
 # =========================================================
 
+_JSON_FENCED = re.compile(r"```json\s*(\{.*?\})\s*```", re.DOTALL | re.IGNORECASE)
+_JSON_FENCED_PLAIN = re.compile(r"```\s*(\{.*?\})\s*```", re.DOTALL)
+_JSON_BLOCK = re.compile(r"\{.*?\}", re.DOTALL)
+
+
 def _extract_json(text: str) -> str:
     """
     Extrait le JSON le plus probable d'une réponse IA.
@@ -47,41 +180,49 @@ def _extract_json(text: str) -> str:
     - fallback : plus grand bloc {...}
     """
     # ```json ... ```
-    m = re.search(r"```json\s*(\{.*?\})\s*```", text, re.DOTALL | re.IGNORECASE)
+    m = _JSON_FENCED.search(text)
     if m:
         return m.group(1).strip()
 
     # ``` ... ```
-    m = re.search(r"```\s*(\{.*?\})\s*```", text, re.DOTALL)
+    m = _JSON_FENCED_PLAIN.search(text)
     if m:
         return m.group(1).strip()
 
-    # fallback : prendre le plus gros {...}
-    blocks = re.findall(r"\{.*?\}", text, re.DOTALL)
-    if not blocks:
+    # fallback : prendre le plus gros {...} (le premier en cas d'égalité)
+    m = max(_JSON_BLOCK.finditer(text), key=lambda m: m.end() - m.start(), default=None)
+    if m is None:
         raise ValueError("Aucun JSON détecté dans la réponse IA")
 
-    blocks.sort(key=len, reverse=True)
-    return blocks[0].strip()
+    return m.group().strip()
+
+
+_KEY_CTRL = str.maketrans("", "", "\n\r\t")
+
+
+def _clean_key(k):
+    if not isinstance(k, str):
+        return k
+    return k.strip().translate(_KEY_CTRL).strip('"').strip("'")
 
 
-def _clean_keys(obj):
+def _clean_keys(obj, _seen=None):
     """
     Nettoie récursivement les clés (espaces, retours ligne, guillemets).
     """
+    # les dicts frères (ex. entrées d'expérience) ont les mêmes clés : nettoyées une fois
+    if _seen is None:
+        _seen = {}
     if isinstance(obj, dict):
         clean = {}
         for k, v in obj.items():
-            if isinstance(k, str):
-                kk = k.strip()
-                kk = kk.replace("\n", "").replace("\r", "").replace("\t", "")
-                kk = kk.strip('"').strip("'")
-            else:
-                kk = k
-            clean[kk] = _clean_keys(v)
+            kk = _seen.get(k)
+            if kk is None:
+                kk = _seen[k] = _clean_key(k)
+            clean[kk] = _clean_keys(v, _seen)
         return clean
     elif isinstance(obj, list):
-        return [_clean_keys(x) for x in obj]
+        return [_clean_keys(x, _seen) for x in obj]
     else:
         return obj
 
@@ -101,25 +242,24 @@ def _norm_key(k: str) -> str:
     return k.lower()
 
 
-def _pick(d: dict, wanted: str):
+def _norm_map(d: dict) -> dict:
     """
-    Récupère une valeur même si la clé est cassée.
+    Table clé normalisée -> valeur, construite une fois par dict,
+    pour récupérer une valeur même si la clé est cassée.
     """
     if not isinstance(d, dict):
-        return None
+        return {}
 
-    wanted_n = _norm_key(wanted)
-
-    # direct
-    if wanted in d:
-        return d[wanted]
-
-    # par normalisation
+    # par normalisation : la première clé rencontrée l'emporte
+    norm = {}
     for k, v in d.items():
-        if _norm_key(k) == wanted_n:
-            return v
+        norm.setdefault(_norm_key(k), v)
 
-    return None
+    # une clé déjà propre (ex. "profile") est prioritaire sur ses variantes cassées
+    for k, v in d.items():
+        if isinstance(k, str) and _norm_key(k) == k:
+            norm[k] = v
+    return norm
 
 
 def _ensure_list(x):
@@ -154,17 +294,23 @@ def generate_cv_structured(data, model="llama3.1"):
     from prompts import CV_STRUCTURED_PROMPT
 
     prompt = CV_STRUCTURED_PROMPT.format(**data)
-    raw = ask_ollama(prompt, model=model)
+    raw = ask_ollama_cached(prompt, model=model)
 
-    # DEBUG (laisse-le, utile pour le rapport aussi)
-    with open("debug_cv_raw.txt", "w", encoding="utf-8") as f:
-        f.write(raw)
+    # DEBUG (utile pour le rapport aussi) : seulement si CARTABLE_DEBUG=1
+    if _DEBUG:
+        with open("debug_cv_raw.txt", "w", encoding="utf-8") as f:
+            f.write(raw)
 
-    json_text = _extract_json(raw)
+    try:
+        json_text = _extract_json(raw)
+    except ValueError:
+        _forget_cached(prompt, model=model)
+        raise
 
     try:
         parsed = json.loads(json_text)
     except Exception:
+        _forget_cached(prompt, model=model)
         with open("debug_cv_bad_json.txt", "w", encoding="utf-8") as f:
             f.write(json_text)
         raise ValueError("JSON invalide renvoyé par l'IA (voir debug_cv_bad_json.txt)")
@@ -172,14 +318,15 @@ def generate_cv_structured(data, model="llama3.1"):
     parsed = _clean_keys(parsed)
 
     # récupération SAFE des champs
-    header = _pick(parsed, "header") or {}
-    profile = _pick(parsed, "profile")
-    education = _pick(parsed, "education")
-    skills = _pick(parsed, "skills")
-    experience = _pick(parsed, "experience")
-    projects = _pick(parsed, "projects")
-    languages = _pick(parsed, "languages")
-    interests = _pick(parsed, "interests")
+    norm_map = _norm_map(parsed)
+    header = norm_map.get("header") or {}
+    profile = norm_map.get("profile")
+    education = norm_map.get("education")
+    skills = norm_map.get("skills")
+    experience = norm_map.get("experience")
+    projects = norm_map.get("projects")
+    languages = norm_map.get("languages")
+    interests = norm_map.get("interests")
 
     # sécuriser header
     if not isinstance(header, dict):
@@ -227,4 +374,4 @@ def interview_question(job, model="llama3.1"):
 def interview_feedback(job, answer, model="llama3.1"):
     from prompts import INTERVIEW_FEEDBACK_PROMPT
     prompt = INTERVIEW_FEEDBACK_PROMPT.format(job=job, answer=answer)
-    return ask_ollama(prompt, model=model)
+    return ask_ollama_cached(prompt, model=model)
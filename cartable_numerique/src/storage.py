@@ -1,10 +1,30 @@
 import os
+import re
 import json
 import shutil
 import sys
 import subprocess
+import functools
+import threading
+import atexit
 from datetime import datetime
 
+# orjson (optionnel) : lecture/écriture de l'index bien plus rapides que json
+try:
+    import orjson
+
+    def _loads(data):
+        return orjson.loads(data)
+
+    def _dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    def _loads(data):
+        return json.loads(data)
+
+    def _dumps(obj):
+        return json.dumps(obj, indent=2).encode("utf-8")
+
 # Chemins de base
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data")
@@ -12,6 +32,9 @@ DOCS_DIR = os.path.join(DATA_DIR, "documents")
 NOTES_DIR = os.path.join(DATA_DIR, "notes")
 INDEX_PATH = os.path.join(DATA_DIR, "index.json")
 
+# caractères interdits dans un nom de fichier de note : tout sauf lettres/chiffres (Unicode), espace, _ et -
+_UNSAFE_TITLE_RE = re.compile(r"[^\w \-]")
+
 
 # ---------- INITIALISATION ----------
 
@@ -20,17 +43,100 @@ def init_storage():
     os.makedirs(NOTES_DIR, exist_ok=True)
     if not os.path.exists(INDEX_PATH):
         with open(INDEX_PATH, "w", encoding="utf-8") as f:
-            json.dump({"documents": [], "notes": []}, f, indent=2)
+            json.dump({"documents": {}, "notes": {}}, f, indent=2)
+
+
+# index gardé en mémoire tant que le fichier n'a pas changé sur disque
+_INDEX_CACHE = None
+_INDEX_STAMP = None  # (mtime_ns, taille) du fichier correspondant au cache
+
+# écritures regroupées : une rafale de modifications -> une seule réécriture
+_INDEX_FLUSH_DELAY = 0.5  # secondes
+_INDEX_LOCK = threading.RLock()
+_dirty = False
+_flush_timer = None
+
+
+def _index_stamp():
+    st = os.stat(INDEX_PATH)
+    return st.st_mtime_ns, st.st_size
 
 
 def _load_index():
-    with open(INDEX_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+    global _INDEX_CACHE, _INDEX_STAMP
+    with _INDEX_LOCK:
+        # modifications pas encore écrites : la mémoire fait foi
+        if _dirty:
+            return _INDEX_CACHE
+
+        stamp = _index_stamp()
+        if _INDEX_CACHE is not None and stamp == _INDEX_STAMP:
+            return _INDEX_CACHE
+
+        with open(INDEX_PATH, "rb") as f:
+            index = _loads(f.read())
+        _INDEX_CACHE = index
+        _INDEX_STAMP = stamp
+        if _migrate_index(index):
+            _save_index(index)
+        return _INDEX_CACHE
+
+
+def _migrate_index(index):
+    """
+    Ancien format (listes) -> dicts indexés par nom / titre.
+    Retourne True si l'index a été converti.
+    """
+    changed = False
+    for section, key in (("documents", "name"), ("notes", "title")):
+        entries = index.get(section)
+        if isinstance(entries, dict):
+            continue
+        by_key = {}
+        for e in entries or []:
+            by_key.setdefault(e.get(key), e)  # doublons : on garde le premier, comme les anciennes recherches
+        index[section] = by_key
+        changed = True
+    return changed
 
 
 def _save_index(index):
-    with open(INDEX_PATH, "w", encoding="utf-8") as f:
-        json.dump(index, f, indent=2)
+    """
+    Enregistre l'index en mémoire ; l'écriture disque est faite un peu plus tard
+    par flush_index (regroupe les modifications rapprochées).
+    """
+    global _INDEX_CACHE, _dirty, _flush_timer
+    with _INDEX_LOCK:
+        _INDEX_CACHE = index
+        _dirty = True
+        if _flush_timer is None:
+            _flush_timer = threading.Timer(_INDEX_FLUSH_DELAY, flush_index)
+            _flush_timer.daemon = True
+            _flush_timer.start()
+
+
+def flush_index():
+    """
+    Écrit l'index sur disque s'il a été modifié.
+    """
+    global _INDEX_STAMP, _dirty, _flush_timer
+    with _INDEX_LOCK:
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+            _flush_timer = None
+        if not _dirty:
+            return
+
+        # écriture atomique : un crash pendant l'écriture ne laisse pas un index tronqué
+        tmp = INDEX_PATH + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_dumps(_INDEX_CACHE))
+        os.replace(tmp, INDEX_PATH)
+        _INDEX_STAMP = _index_stamp()
+        _dirty = False
+
+
+atexit.register(flush_index)
 
 
 # ---------- CLOUD LOCAL (DOCUMENTS) ----------
@@ -42,26 +148,39 @@ def import_document(path):
 
     filename = os.path.basename(path)
     dest = os.path.join(DOCS_DIR, filename)
-    shutil.copy2(path, dest)
+    # copyfile passe par la copie noyau (sendfile / fcopyfile / CopyFileW) ;
+    # copystat garde les dates d'origine, comme copy2
+    shutil.copyfile(path, dest)
+    shutil.copystat(path, dest)
 
-    index = _load_index()
-    index["documents"].append({
-        "name": filename,
-        "imported_at": datetime.now().isoformat()
-    })
-    _save_index(index)
+    with _INDEX_LOCK:
+        index = _load_index()
+        index["documents"][filename] = {
+            "name": filename,
+            "folder": "",
+            "imported_at": datetime.now().isoformat()
+        }
+        _save_index(index)
 
 
 def list_documents():
     init_storage()
-    return _load_index()["documents"]
+    # copies : l'appelant ne doit pas modifier l'index en cache
+    return [dict(d) for d in _load_index()["documents"].values()]
 
 
 def find_document_path(doc_name):
     """
-    Recherche un document dans data/documents et tous ses sous-dossiers
+    Retrouve un document via le dossier enregistré dans l'index.
+    Sinon (fichier ajouté à la main), recherche dans data/documents et ses sous-dossiers.
     """
     init_storage()
+    d = _load_index()["documents"].get(doc_name)
+    if d:
+        path = os.path.join(DOCS_DIR, d.get("folder") or "", doc_name)
+        if os.path.isfile(path):
+            return path
+
     for root, dirs, files in os.walk(DOCS_DIR):
         if doc_name in files:
             return os.path.join(root, doc_name)
@@ -88,11 +207,10 @@ def delete_document(name):
 
     os.remove(path)
 
-    index = _load_index()
-    index["documents"] = [
-        d for d in index["documents"] if d["name"] != name
-    ]
-    _save_index(index)
+    with _INDEX_LOCK:
+        index = _load_index()
+        index["documents"].pop(name, None)
+        _save_index(index)
 
 
 # ---------- DOSSIERS ----------
@@ -128,20 +246,19 @@ def move_document_to_folder(doc_name, folder_name):
     dest_path = os.path.join(dest_folder, doc_name)
     shutil.move(src_path, dest_path)
 
-    index = _load_index()
-    for d in index["documents"]:
-        if d["name"] == doc_name:
+    with _INDEX_LOCK:
+        index = _load_index()
+        d = index["documents"].get(doc_name)
+        if d is not None:
             d["folder"] = folder_name
-    _save_index(index)
+            _save_index(index)
 
 
 # ---------- NOTES ----------
 
 def create_note(title, content):
     init_storage()
-    safe_title = "".join(
-        c for c in title if c.isalnum() or c in (" ", "_", "-")
-    ).strip().replace(" ", "_")
+    safe_title = _UNSAFE_TITLE_RE.sub("", title).strip().replace(" ", "_")
 
     if not safe_title:
         safe_title = "note"
@@ -151,42 +268,50 @@ def create_note(title, content):
 
     with open(path, "w", encoding="utf-8") as f:
         f.write(content)
+    _read_text_cached.cache_clear()  # même titre : le fichier est réécrit
 
-    index = _load_index()
-    index["notes"].append({
-        "title": title,
-        "file": filename,
-        "created_at": datetime.now().isoformat()
-    })
-    _save_index(index)
+    with _INDEX_LOCK:
+        index = _load_index()
+        index["notes"][title] = {
+            "title": title,
+            "file": filename,
+            "created_at": datetime.now().isoformat()
+        }
+        _save_index(index)
 
 
 def list_notes():
     init_storage()
-    return _load_index()["notes"]
+    return [dict(n) for n in _load_index()["notes"].values()]
 def find_note_path_by_title(title):
     """
     Retrouve le fichier note associé à un titre via l'index.json.
     Retourne le chemin complet du fichier.
     """
     init_storage()
-    index = _load_index()
-    for n in index["notes"]:
-        if n["title"] == title:
-            return os.path.join(NOTES_DIR, n["file"])
-    return None
+    n = _load_index()["notes"].get(title)
+    if n is None:
+        return None
+    return os.path.join(NOTES_DIR, n["file"])
+
+
+@functools.lru_cache(maxsize=32)
+def _read_text_cached(path, mtime_ns, size):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
 
 
 def read_note(title):
     """
     Retourne le contenu d'une note (par titre).
+    Le contenu est mis en cache tant que le fichier n'a pas changé (mtime + taille).
     """
     path = find_note_path_by_title(title)
     if not path or not os.path.exists(path):
         raise FileNotFoundError("Note introuvable")
 
-    with open(path, "r", encoding="utf-8") as f:
-        return f.read()
+    st = os.stat(path)
+    return _read_text_cached(path, st.st_mtime_ns, st.st_size)
 
 
 def edit_note(title, new_content):
@@ -199,6 +324,8 @@ def edit_note(title, new_content):
 
     with open(path, "w", encoding="utf-8") as f:
         f.write(new_content)
+    # mtime grossier (FAT, certains partages) : même clé possible, on vide le cache
+    _read_text_cached.cache_clear()
 
 
 def delete_note(title):
@@ -206,15 +333,7 @@ def delete_note(title):
     Supprime une note (fichier + entrée dans l'index).
     """
     init_storage()
-    index = _load_index()
-
-    # trouver la note
-    note_obj = None
-    for n in index["notes"]:
-        if n["title"] == title:
-            note_obj = n
-            break
-
+    note_obj = _load_index()["notes"].get(title)
     if not note_obj:
         raise FileNotFoundError("Note introuvable")
 
@@ -222,7 +341,10 @@ def delete_note(title):
     path = os.path.join(NOTES_DIR, note_obj["file"])
     if os.path.exists(path):
         os.remove(path)
+    _read_text_cached.cache_clear()
 
     # supprimer de l'index
-    index["notes"] = [n for n in index["notes"] if n["title"] != title]
-    _save_index(index)
+    with _INDEX_LOCK:
+        index = _load_index()
+        index["notes"].pop(title, None)
+        _save_index(index)
@@ -0,0 +1,34 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+try:
+    import app_gui
+except ImportError as e:  # reportlab / tkinter absents
+    raise unittest.SkipTest(f"app_gui non importable : {e}")
+
+
+QCM_JSON = (
+    '{"questions": [{"question": "Capitale de la France ?", '
+    '"options": ["Lyon", "Paris"], "answer": "B", "explanation": "Paris."}]}'
+)
+
+
+class ParseQcmJsonTest(unittest.TestCase):
+    def test_json_after_bracket_preamble(self):
+        # "[1]" se décode en JSON mais n'est pas un QCM : on passe au suivant
+        data = app_gui._parse_qcm_pipeline("Voici le QCM (note [1]) :\n" + QCM_JSON)
+        self.assertIsNotNone(data)
+        self.assertEqual(data["question"], ["Capitale de la France ?"])
+        self.assertEqual(data["options"], [["Lyon", "Paris"]])
+
+    def test_json_after_inline_example(self):
+        data = app_gui._parse_qcm_pipeline('Format {"a": 1} :\n' + QCM_JSON)
+        self.assertIsNotNone(data)
+        self.assertEqual(data["answer"], ["B"])
+
+
+if __name__ == "__main__":
+    unittest.main()